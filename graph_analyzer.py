@@ -1,10 +1,16 @@
+import heapq
 import networkx as nx
+from graph_builder import node_id, node_name
 from typing import Dict, Any # <-- FIX: Import 'Any' and 'Dict' from typing
 
+# Number of source nodes sampled for approximate betweenness centrality on large graphs
+BETWEENNESS_SAMPLE_SIZE = 100
+
 def analyze_graph(G: nx.MultiDiGraph) -> Dict[str, Any]:
     """
     Analyzes the graph to identify critical nodes and structural properties.
     This fulfills Step 2: analyze this graph.
+    Nodes are looked up and reported by canonical name.
     """
     analysis_results = {}
 
@@ -13,32 +19,35 @@ def analyze_graph(G: nx.MultiDiGraph) -> Dict[str, Any]:
     # and In-Degree Centrality (how many suppliers feed into it).
 
     # Betweenness Centrality: Identifies nodes that act as 'bridges'
-    betweenness = nx.betweenness_centrality(G)
-    top_bottlenecks = sorted(betweenness.items(), key=lambda item: item[1], reverse=True)[:3]
+    # Above BETWEENNESS_SAMPLE_SIZE nodes this is approximated from k sampled source nodes
+    # (O(k*E) instead of O(V*E)). The values are estimates, but they are only used to
+    # rank the top bottlenecks, which sampling preserves well.
+    k = BETWEENNESS_SAMPLE_SIZE if len(G) > BETWEENNESS_SAMPLE_SIZE else None
+    betweenness = nx.betweenness_centrality(G, k=k, seed=42)
+    top_bottlenecks = heapq.nlargest(3, betweenness.items(), key=lambda item: item[1])
     analysis_results['Centrality_Bottlenecks'] = {
         'Description': "Nodes with high Betweenness Centrality are critical bottlenecks, as they connect otherwise separate parts of the supply chain.",
-        'Top_Bottlenecks': top_bottlenecks
+        'Top_Bottlenecks': [(node_name(G, n), v) for n, v in top_bottlenecks]
     }
 
     # In-Degree Centrality: Nodes with many incoming links (e.g., key aggregation points)
     in_degree = G.in_degree()
-    # Convert degree view to a dictionary for sorting
-    in_degree_dict = dict(in_degree)
-    top_hubs = sorted(in_degree_dict.items(), key=lambda item: item[1], reverse=True)[:3]
+    # The degree view already yields (node, degree) pairs
+    top_hubs = heapq.nlargest(3, in_degree, key=lambda item: item[1])
     analysis_results['Centrality_Hubs'] = {
         'Description': "Nodes with high In-Degree Centrality are major consumption/assembly hubs.",
-        'Top_Hubs': top_hubs
+        'Top_Hubs': [(node_name(G, n), d) for n, d in top_hubs]
     }
 
     # 2. Clustering Analysis (Identifying Risk Regions/Communities)
     # We use a simple community detection algorithm (e.g., Louvain) for an undirected graph view
     # to find closely related groups.
     try:
-        # Need to use the undirected version of the graph
-        communities = list(nx.community.label_propagation_communities(G.to_undirected()))
+        # Need the undirected version of the graph: a read-only view shares G's storage instead of copying every edge
+        communities = list(nx.community.label_propagation_communities(G.to_undirected(as_view=True)))
         analysis_results['Clustering_Communities'] = {
             'Description': "Communities (clusters) represent densely connected groups, often indicating shared regional, organizational, or supply-path risks. If one node is affected, others in the community are highly susceptible.",
-            'Communities': [list(c) for c in communities if len(c) > 1]
+            'Communities': [[node_name(G, n) for n in c] for c in communities if len(c) > 1]
         }
     except Exception as e:
         analysis_results['Clustering_Communities'] = f"Clustering failed: {e}. Graph might be too sparse."
@@ -48,10 +57,10 @@ def analyze_graph(G: nx.MultiDiGraph) -> Dict[str, Any]:
     start_node = "Foxconn Facility No. 3"
     end_node = "Brand A Distribution Center"
     try:
-        shortest_path = nx.shortest_path(G, source=start_node, target=end_node)
+        shortest_path = nx.shortest_path(G, source=node_id(G, start_node), target=node_id(G, end_node))
         analysis_results['Shortest_Path'] = {
             'Description': f"The shortest path from '{start_node}' to '{end_node}' is crucial for calculating total lead time or emissions.",
-            'Path': shortest_path,
+            'Path': [node_name(G, n) for n in shortest_path],
             'Length': len(shortest_path) - 1
         }
     except nx.NetworkXNoPath:
@@ -61,10 +70,10 @@ def analyze_graph(G: nx.MultiDiGraph) -> Dict[str, Any]:
     # 4. Connectivity/Failure Simulation (Simple Scenario)
     # What nodes contribute to Brand A DC?
     try:
-        upstream_suppliers = list(nx.ancestors(G, "Brand A Distribution Center"))
+        upstream_suppliers = list(nx.ancestors(G, node_id(G, "Brand A Distribution Center")))
         analysis_results['Upstream_Audit_Subgraph'] = {
             'Description': "Nodes contributing to the final product (Subgraph for audit/traceability).",
-            'Suppliers_for_Brand_A': upstream_suppliers
+            'Suppliers_for_Brand_A': [node_name(G, n) for n in upstream_suppliers]
         }
     except Exception as e:
         analysis_results['Upstream_Audit_Subgraph'] = f"Error during upstream calculation: {e}"
@@ -1,7 +1,10 @@
 import networkx as nx
-from typing import List, Dict, Any, Tuple, Union 
+from typing import List, Dict, Any, Tuple, Union, Optional, Hashable
 import re
-import difflib
+import functools
+import ahocorasick
+import numpy as np
+from rapidfuzz import process, fuzz, utils
 
 # --- MOCK NLP/EMBEDDING CONFIGURATION ---
 SIMILARITY_MAP = {
@@ -10,10 +13,15 @@ SIMILARITY_MAP = {
     "Sunrise Textile India": "Sunrise Textiles",
     "Brand A DC": "Brand A Distribution Center",
     "OETX": "OEKO-TEX",
-    "VN": "Vietnam",
     "FCN3": "Foxconn Facility No. 3",
 }
 
+# Regions are resolved separately so they are never fuzzy-matched against facility names.
+# Keys are upper-case region codes.
+REGION_MAP = {
+    "VN": "Vietnam",
+}
+
 RELATION_MAP = {
     "Supplies": "SUPPLIES",
     "Delivers": "SUPPLIES",
@@ -22,12 +30,33 @@ RELATION_MAP = {
     "assembly": "FINAL_ASSEMBLY",
 }
 
+# Canonical names are fixed at import time, so build the fuzzy-match choices once
+canonical_names_list = list(set(SIMILARITY_MAP.values()))
+canonical_set = frozenset(canonical_names_list)
+FUZZY_SCORE_CUTOFF = 80
+
+# Precompiled matchers for _preprocess_name. Aliases are found with an Aho-Corasick
+# automaton, so a name is scanned once no matter how large SIMILARITY_MAP grows.
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_ALIAS_AUTOMATON = ahocorasick.Automaton()
+for _abbr, _expanded in SIMILARITY_MAP.items():
+    _ALIAS_AUTOMATON.add_word(_abbr.lower(), (len(_abbr.lower()), _expanded.lower()))
+_ALIAS_AUTOMATON.make_automaton()
+
+# Precompiled patterns for extract_relations. _RELATION_LOOKUP keeps the
+# RELATION_MAP order as a priority so the first listed phrase still wins.
+_RE_TO_FOR = re.compile(r'(to|for)\s+([\w\s\.]+)')
+_RE_MATERIAL = re.compile(r'(supplies|delivers|ships|produces)\s+(.*?)\s+(to|for)')
+_RELATION_PHRASES = tuple((phrase.lower(), r_type) for phrase, r_type in RELATION_MAP.items())
+_RELATION_LOOKUP = {phrase: (priority, r_type) for priority, (phrase, r_type) in enumerate(_RELATION_PHRASES)}
+_RELATION_RE = re.compile(r'\b(' + '|'.join(re.escape(phrase) for phrase, _ in _RELATION_PHRASES) + r')\b')
+
 # --- Helper function for consistent node initialization ---
-def _initialize_node_attributes(node_id: int, canonical_name: str) -> Dict[str, Any]:
+def _initialize_node_attributes(node_key: int, canonical_name: str) -> Dict[str, Any]:
     """Provides a consistent set of default attributes for any new Facility node."""
     return {
         "label": "Facility",
-        "id": f"fac_{node_id}",
+        "id": f"fac_{node_key}",
         "name": canonical_name,
         "certifications": set(), # MUST be initialized as a set
         "tier": None,
@@ -38,37 +67,105 @@ def _initialize_node_attributes(node_id: int, canonical_name: str) -> Dict[str,
     }
 # --- End Helper function ---
 
+def _expand_aliases(name: str) -> str:
+    """Replaces every alias in name with its expansion in one pass (longest-leftmost wins on overlap)."""
+    matches = sorted(
+        ((end - length + 1, length, expanded) for end, (length, expanded) in _ALIAS_AUTOMATON.iter(name)),
+        key=lambda match: (match[0], -match[1])
+    )
+    parts = []
+    pos = 0
+    for start, length, expanded in matches:
+        if start < pos: # overlaps an alias that was already replaced
+            continue
+        parts.append(name[pos:start])
+        parts.append(expanded)
+        pos = start + length
+    parts.append(name[pos:])
+    return ''.join(parts)
+
+@functools.lru_cache(maxsize=4096)
 def _preprocess_name(name: str) -> str:
     """Preprocess name: lower, strip punc, expand common abbs (simulated)."""
     name = name.lower().strip()
-    name = re.sub(r'[^\w\s]', '', name) # strip punctuation
-    for abbr, expanded in SIMILARITY_MAP.items():
-        name = name.replace(abbr.lower(), expanded.lower())
-    return name
+    name = _PUNCT_RE.sub('', name) # strip punctuation
+    return _expand_aliases(name)
 
-def resolve_entity(name: str) -> str:
-    """
-    Simulates the Entity Resolution process.
-    """
+@functools.lru_cache(maxsize=None)
+def _match_alias(name: str) -> Optional[str]:
+    """Returns the canonical name for an exact match or known alias, else None."""
     processed_name = _preprocess_name(name)
 
-    canonical_names = set(SIMILARITY_MAP.values())
-    
-    # 1. Check for exact match or known alias
     for alias, canonical in SIMILARITY_MAP.items():
         if name.strip() == alias:
             return canonical
         if processed_name in _preprocess_name(alias):
              return canonical
+    return None
+
+@functools.lru_cache(maxsize=None)
+def resolve_entity(name: str) -> str:
+    """
+    Simulates the Entity Resolution process.
+    Results are memoized, so repeated raw names resolve with a dict lookup.
+    """
+    # 0. Already canonical: nothing to resolve
+    if name.strip() in canonical_set:
+        return name.strip()
 
-    # 2. Use fuzzy matching against canonical names
-    closest_match = difflib.get_close_matches(name.strip(), list(canonical_names), n=1, cutoff=0.8)
+    # 1. Check for exact match or known alias
+    alias_match = _match_alias(name)
+    if alias_match:
+        return alias_match
+
+    # 2. Use fuzzy matching against canonical names (plain Levenshtein ratio, as difflib;
+    # WRatio's partial/token scores would merge unrelated facilities such as "Plant 3 Corp")
+    closest_match = process.extractOne(
+        name, canonical_names_list,
+        scorer=fuzz.ratio, processor=utils.default_process, score_cutoff=FUZZY_SCORE_CUTOFF
+    )
     if closest_match:
         return closest_match[0]
 
     # 3. If no match, the name itself becomes the canonical name
     return name.strip()
 
+def resolve_entities(raw_names: List[str]) -> Dict[str, str]:
+    """
+    Batch version of resolve_entity: returns a raw -> canonical mapping.
+    Names without a known alias are fuzzy-matched together in a single
+    rapidfuzz cdist call instead of one extractOne scan per name.
+    """
+    resolved = {}
+    unmatched = []
+    for name in dict.fromkeys(raw_names): # de-duplicate, keep order
+        if name.strip() in canonical_set:
+            resolved[name] = name.strip()
+            continue
+        alias_match = _match_alias(name)
+        if alias_match:
+            resolved[name] = alias_match
+        else:
+            unmatched.append(name)
+
+    if unmatched:
+        # (M, K) score matrix: one row per unmatched name, one column per canonical name
+        scores = process.cdist(
+            unmatched, canonical_names_list,
+            scorer=fuzz.ratio, processor=utils.default_process, workers=-1
+        )
+        best_idx = scores.argmax(axis=1)
+        is_match = scores[np.arange(len(unmatched)), best_idx] >= FUZZY_SCORE_CUTOFF
+        for name, idx, matched in zip(unmatched, best_idx, is_match):
+            resolved[name] = canonical_names_list[idx] if matched else name.strip()
+
+    return resolved
+
+
+def resolve_region(name: str) -> str:
+    """Resolves a region code or name against the (much smaller) REGION_MAP, case-insensitively."""
+    return REGION_MAP.get(name.strip().upper(), name.strip())
+
 
 def extract_relations(text: str) -> Union[Tuple[str, str, str], None]:
     """
@@ -78,7 +175,7 @@ def extract_relations(text: str) -> Union[Tuple[str, str, str], None]:
     text_lower = text.lower()
     
     # Pattern 1: Look for "to [TARGET_NAME]" or "for [TARGET_NAME]"
-    match_to = re.search(r'(to|for)\s+([\w\s\.]+)', text_lower)
+    match_to = _RE_TO_FOR.search(text_lower)
     
     if match_to:
         # Capture the destination entity name (everything after 'to' or 'for')
@@ -88,14 +185,11 @@ def extract_relations(text: str) -> Union[Tuple[str, str, str], None]:
         target_name = resolve_entity(raw_object_name.split('.')[0].strip())
         
         # Identify the relation type based on surrounding verbs
-        rel_type = "UNKNOWN_RELATION"
-        for phrase, r_type in RELATION_MAP.items():
-            if phrase.lower() in text_lower:
-                rel_type = r_type
-                break
+        found = [_RELATION_LOOKUP[m.group(1)] for m in _RELATION_RE.finditer(text_lower)]
+        rel_type = min(found)[1] if found else "UNKNOWN_RELATION"
 
         # Extract Material: Everything between the first recognized verb and the preposition 'to/for'
-        material_match = re.search(r'(supplies|delivers|ships|produces)\s+(.*?)\s+(to|for)', text_lower)
+        material_match = _RE_MATERIAL.search(text_lower)
         material = material_match.group(2).strip() if material_match and material_match.group(2) else "UNKNOWN MATERIAL"
 
         if material == "":
@@ -109,43 +203,72 @@ def extract_relations(text: str) -> Union[Tuple[str, str, str], None]:
 
     return None
 
+def node_id(G: nx.MultiDiGraph, name: str) -> Hashable:
+    """Looks up the node key for a canonical name (the name itself if the graph is name-keyed)."""
+    return G.graph.get('name_to_id', {}).get(name, name)
+
+def node_name(G: nx.MultiDiGraph, node: Hashable) -> str:
+    """Translates a node key back to its canonical name for output."""
+    return G.graph.get('id_to_name', {}).get(node, node)
+
 def build_graph(raw_data: List[Dict[str, Any]]) -> nx.MultiDiGraph:
     """
     Processes raw data, performs ER/RE, and builds the NetworkX graph.
+    Nodes are keyed by integer id; the canonical name is stored in the 'name'
+    attribute and in the G.graph['name_to_id'] / G.graph['id_to_name'] tables.
     """
     G = nx.MultiDiGraph()
-    facility_nodes = {} # Used for generating unique IDs
+    facility_nodes = {} # canonical name -> integer node id
 
-    # 1. Create Nodes and Add Attributes
+    # 0. Collect every raw name that needs resolution and resolve them in one batch
+    raw_names = []
+    relations = []
     for item in raw_data:
         raw_name = item.get("facility_name") or item.get("facility_key")
+        relation_result = None
+        if raw_name:
+            raw_names.append(raw_name)
+            if item.get("certification"):
+                raw_names.append(item["certification"])
+            # Edge targets are resolved inside extract_relations and regions by resolve_region
+            if item.get("relation_text"):
+                relation_result = extract_relations(item["relation_text"])
+        relations.append(relation_result)
+
+    resolved = resolve_entities(raw_names)
+
+    # 1. Collect Nodes and Aggregate Attributes (the graph is built in bulk afterwards)
+    node_attrs = {} # node id -> final attribute dict
+    edges = []
+    for item, relation_result in zip(raw_data, relations):
+        raw_name = item.get("facility_name") or item.get("facility_key")
         
         if raw_name:
             # Entity Resolution
-            canonical_name = resolve_entity(raw_name)
+            canonical_name = resolved[raw_name]
 
             # A. Explicit Node Creation (First time we see the entity)
-            if canonical_name not in G:
+            if canonical_name not in facility_nodes:
                 node_id_counter = len(facility_nodes) + 1
                 facility_nodes[canonical_name] = node_id_counter
                 
                 # Use the helper function for consistent initialization
-                attributes = _initialize_node_attributes(node_id_counter, canonical_name)
-                G.add_node(canonical_name, **attributes)
+                node_attrs[node_id_counter] = _initialize_node_attributes(node_id_counter, canonical_name)
             
             # B. Attribute Aggregation (Regardless of whether it was just created or already existed)
-            node_data = G.nodes[canonical_name]
+            source_id = facility_nodes[canonical_name]
+            node_data = node_attrs[source_id]
             
             # Certifications (Add to the set)
             cert = item.get("certification")
             if cert:
-                node_data['certifications'].add(resolve_entity(cert))
+                node_data['certifications'].add(resolved[cert])
 
             # Other simple attributes (Overwrites with most recent data)
             if item.get("tier"):
                 node_data['tier'] = item["tier"]
             if item.get("region"):
-                node_data['region'] = resolve_entity(item["region"])
+                node_data['region'] = resolve_region(item["region"])
 
             # Risk/Dependency attributes
             if item.get("risk_score") is not None:
@@ -155,37 +278,35 @@ def build_graph(raw_data: List[Dict[str, Any]]) -> nx.MultiDiGraph:
             if item.get("buffer") is not None:
                  node_data['inventory_buffer'] = item["buffer"]
             
-            # 2. Extract and Create Edges
-            relation_text = item.get("relation_text")
-            if relation_text:
-                relation_result = extract_relations(relation_text)
-                if relation_result:
-                    rel_type, target_name, material = relation_result
-                    
-                    # Ensure target node exists (Resolve the target name)
-                    resolved_target_name = resolve_entity(target_name)
+            # 2. Collect Edges
+            if relation_result:
+                rel_type, target_name, material = relation_result
+                
+                # C. Implicit Node Creation (Target of an edge not seen before)
+                # target_name was already resolved by extract_relations
+                if target_name not in facility_nodes:
+                    node_id_counter = len(facility_nodes) + 1
+                    facility_nodes[target_name] = node_id_counter
                     
-                    # C. Implicit Node Creation (Target of an edge not seen before)
-                    if resolved_target_name not in G:
-                        node_id_counter = len(facility_nodes) + 1
-                        facility_nodes[resolved_target_name] = node_id_counter
-                        
-                        # MUST use the same initialization for consistency
-                        attributes = _initialize_node_attributes(node_id_counter, resolved_target_name)
-                        G.add_node(resolved_target_name, **attributes)
-
-                    # Create the edge
-                    G.add_edge(
-                        canonical_name, 
-                        resolved_target_name,    
-                        relation=rel_type,
-                        material=material,
-                        weight=1.0 
-                    )
+                    # MUST use the same initialization for consistency
+                    node_attrs[node_id_counter] = _initialize_node_attributes(node_id_counter, target_name)
+
+                edges.append((
+                    source_id, 
+                    facility_nodes[target_name],    
+                    {"relation": rel_type, "material": material, "weight": 1.0}
+                ))
     
     # Final cleanup of attributes (convert sets back to list for cleaner output)
-    for node, data in G.nodes(data=True):
-        if 'certifications' in data:
-            data['certifications'] = list(data['certifications'])
+    for data in node_attrs.values():
+        data['certifications'] = list(data['certifications'])
+
+    # 3. Build the graph in bulk, each node inserted once with its final attributes
+    G.add_nodes_from(node_attrs.items())
+    G.add_edges_from(edges)
+
+    # Name <-> id tables: nodes are keyed by integer id, names are only needed for lookups and output
+    G.graph['name_to_id'] = facility_nodes
+    G.graph['id_to_name'] = {node_key: name for name, node_key in facility_nodes.items()}
 
-    return G
\ No newline at end of file
+    return G
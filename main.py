@@ -1,6 +1,6 @@
 import networkx as nx
 from data_simulator import simulate_data
-from graph_builder import build_graph
+from graph_builder import build_graph, node_id, node_name
 from graph_analyzer import analyze_graph
 from risk_modeler import simple_risk_propagation, monte_carlo_disruption_simulation
 
@@ -22,14 +22,14 @@ def main():
     print(f"\nGraph created successfully! Nodes: {G.number_of_nodes()}, Edges: {G.number_of_edges()}")
     
     print("\n--- Example Node Attributes (Foxconn Facility No. 3) ---")
-    foxconn_node = "Foxconn Facility No. 3"
+    foxconn_node = node_id(G, "Foxconn Facility No. 3")
     if G.has_node(foxconn_node):
         print(G.nodes[foxconn_node])
     
     print("\n--- Example Edge (Foxconn -> Sunrise Textiles) ---")
     try:
-        edge_data = G.get_edge_data(foxconn_node, "Sunrise Textiles")
-        print(list(edge_data.values())[0])
+        edge_data = G.get_edge_data(foxconn_node, node_id(G, "Sunrise Textiles"))
+        print(next(iter(edge_data.values())))
     except:
         print("Edge not found or structure mismatch.")
 
@@ -62,9 +62,8 @@ def main():
     propagated_risk = simple_risk_propagation(G)
     print("\n[3.1] Propagated Risk Score (Simple Model)")
     print("Downstream Risk = Max(Local Risk, Upstream Risk * Propagated Weight)")
-    sorted_risk = dict(sorted(propagated_risk.items(), key=lambda item: item[1], reverse=True))
-    for node, risk in sorted_risk.items():
-        print(f"  - {node}: {risk:.4f} (Base: {G.nodes[node].get('risk_score', 0.0):.2f})")
+    for node, risk in sorted(propagated_risk.items(), key=lambda item: item[1], reverse=True):
+        print(f"  - {node_name(G, node)}: {risk:.4f} (Base: {G.nodes[node].get('risk_score', 0.0):.2f})")
     
     # 3.2 & 3.3 Monte Carlo Simulation
     print("\n[3.3] Monte Carlo Disruption Simulation (1,000 Iterations)")
@@ -72,11 +71,11 @@ def main():
 
     print(f"  * Local Failure Probabilities (P(local failure)):")
     for node, prob in mc_results['local_failure_probabilities'].items():
-        print(f"    - {node}: {prob:.2f}")
+        print(f"    - {node_name(G, node)}: {prob:.2f}")
 
     print("\n  * Disruption Probability (P(final failure)) - Simulated:")
     for node, prob in mc_results['disruption_probability_by_node'].items():
-        print(f"    - {node}: {prob:.2f}")
+        print(f"    - {node_name(G, node)}: {prob:.2f}")
 
     final_prob = mc_results['final_product_disruption_prob']
     print(f"\n==> Final Conclusion: Probability of Brand A DC Disruption: {final_prob:.2%}")
@@ -88,5 +87,5 @@ if __name__ == '__main__':
         nx.__version__
         main()
     except ImportError:
-        print("Error: The 'networkx' library is required to run this project.")
-        print("Please install it using: pip install networkx")
\ No newline at end of file
+        print("Error: The 'networkx', 'numpy', 'rapidfuzz' and 'pyahocorasick' libraries are required to run this project.")
+        print("Please install them using: pip install networkx numpy rapidfuzz pyahocorasick")
\ No newline at end of file
@@ -1,18 +1,17 @@
 import networkx as nx
-import random
-from typing import Dict, Any, List
+import math
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from graph_builder import node_id
+from typing import Dict, Any, List, Hashable
 
-def calculate_edge_weight(data: Dict[str, Any]) -> float:
+def _propagation_weight(dependency: float, buffer_months: float) -> float:
     """
-    Calculates the dependency strength (propagation weight) for an edge.
+    The propagation weight formula (single source of truth; propagation_weights mirrors it for arrays).
     Weight = (Base Dependency) * (1 - Buffer/Elasticity Factor)
     """
-    # Base dependency: 0.7 for strong connection, 1.0 if not specified
-    # Dependency weight comes from the data (e.g., 70% of devices use the material)
-    dependency = data.get('dependency_weight', 1.0) 
-
     # Buffer weight: If inventory > 0, reduce the propagation weight (risk dampening)
-    buffer_months = data.get('inventory_buffer', 0)
     buffer_factor = min(buffer_months / 3, 1.0) # Max 3 months dampening
     
     # Lead time elasticity factor (0.0 to 1.0). For this simulation, we'll assume 
@@ -25,96 +24,166 @@ def calculate_edge_weight(data: Dict[str, Any]) -> float:
     # Ensure weight is between 0.1 and 1.0
     return max(0.1, min(propagation_weight, 1.0))
 
+def calculate_edge_weight(data: Dict[str, Any]) -> float:
+    """
+    Calculates the dependency strength (propagation weight) for an edge.
+    Weight = (Base Dependency) * (1 - Buffer/Elasticity Factor)
+    """
+    # Base dependency: 0.7 for strong connection, 1.0 if not specified
+    # Dependency weight comes from the data (e.g., 70% of devices use the material)
+    dependency = data.get('dependency_weight', 1.0) 
+    buffer_months = data.get('inventory_buffer', 0)
+    return _propagation_weight(dependency, buffer_months)
+
+def propagation_weights(dependency: np.ndarray, buffer_months: np.ndarray) -> np.ndarray:
+    """
+    Array mirror of _propagation_weight: the same formula applied to arrays of
+    (dependency, buffer) values in one call. test_risk_modeler.py checks they agree.
+    """
+    buffer_factor = np.minimum(buffer_months / 3, 1.0)
+    elasticity = np.where(buffer_months == 0, 0.1, 0.0)
+    propagation_weight = dependency * (1.0 - (buffer_factor * 0.5) - (elasticity * 0.1))
+    return np.clip(propagation_weight, 0.1, 1.0)
+
 
-def simple_risk_propagation(G: nx.MultiDiGraph) -> Dict[str, float]:
+def simple_risk_propagation(G: nx.MultiDiGraph) -> Dict[Hashable, float]:
     """
     Step 3.1: Calculates the final risk score using the formula:
     Downstream Risk = Upstream Risk * Propagation Weight
     
     This is a simplified cumulative model.
+    Returns the propagated risk keyed by node key (the integer node id for graphs
+    from build_graph; use graph_builder.node_name to translate for output).
     """
     # 1. Initialize risk scores
-    final_risk = {node: G.nodes[node].get('risk_score', 0.0) for node in G.nodes}
-    
-    # 2. Iterate through nodes in topological order (if possible) or multiple passes
-    # to allow risk to flow downstream. We'll use 5 passes to ensure risk propagates fully.
-    for _ in range(5):
-        for u, v, data in G.edges(data=True):
-            # u -> v (u is upstream, v is downstream)
-            
-            # Calculate Propagation Weight for the edge
-            # For simplicity, we just use the calculated edge weight here.
-            prop_weight = calculate_edge_weight(G.nodes[u]) 
-            
-            # Risk transfer: Add risk from upstream (u) to downstream (v)
-            upstream_risk = final_risk[u]
-            transferred_risk = upstream_risk * prop_weight
-            
-            # Update downstream risk (take the max of current local risk or transferred risk)
-            # A more complex model might average or sum. We use MAX to reflect the highest threat.
-            final_risk[v] = max(final_risk[v], transferred_risk)
-            
-    return final_risk
-
-def monte_carlo_disruption_simulation(G: nx.MultiDiGraph, iterations: int = 1000) -> Dict[str, Any]:
+    node_order = list(G.nodes)
+    index = {node: i for i, node in enumerate(node_order)}
+    risk = np.array([G.nodes[node].get('risk_score', 0.0) for node in node_order], dtype=float)
+
+    # 2. Precompute edge arrays once. The propagation weight only depends on the
+    # upstream node's attributes, so it is calculated per node and gathered per edge.
+    dependency = np.array([G.nodes[node].get('dependency_weight', 1.0) for node in node_order], dtype=float)
+    buffer_months = np.array([G.nodes[node].get('inventory_buffer', 0) for node in node_order], dtype=float)
+    node_weight = propagation_weights(dependency, buffer_months)
+    src_idx = np.array([index[u] for u, v in G.edges()], dtype=np.intp)
+    dst_idx = np.array([index[v] for u, v in G.edges()], dtype=np.intp)
+    w = node_weight[src_idx]
+
+    # 3. Transfer risk along edges (u -> v: v = max(v, u * weight)).
+    # We use MAX to reflect the highest threat.
+    try:
+        generations = list(nx.topological_generations(G))
+    except nx.NetworkXUnfeasible:
+        generations = None
+
+    if generations is not None:
+        # DAG: a single pass in topological order is exact. Edges leaving the same
+        # generation are independent, so each generation is relaxed in one call.
+        node_level = np.empty(len(node_order), dtype=np.intp)
+        for level, nodes in enumerate(generations):
+            node_level[[index[node] for node in nodes]] = level
+        edge_level = node_level[src_idx]
+        edge_order = np.argsort(edge_level, kind='stable')
+        bounds = np.searchsorted(edge_level[edge_order], np.arange(len(generations) + 1))
+        for level in range(len(generations)):
+            edges = edge_order[bounds[level]:bounds[level + 1]]
+            np.maximum.at(risk, dst_idx[edges], risk[src_idx[edges]] * w[edges])
+    else:
+        # Cycles: relax every edge at once until nothing changes
+        while src_idx.size:
+            prev = risk.copy()
+            transferred = risk[src_idx] * w
+            np.maximum.at(risk, dst_idx, transferred)
+            if np.array_equal(prev, risk):
+                break
+
+    return {node: float(risk[i]) for i, node in enumerate(node_order)}
+
+def _reachability_matrix(n: int, src_idx: np.ndarray, dst_idx: np.ndarray) -> np.ndarray:
+    """
+    Transitive closure of the graph as an (n, n) boolean matrix: R[i, j] is True
+    when node j is node i itself or lies downstream of it.
+    Computed by repeated boolean squaring of (I + A), i.e. log2(diameter) matmuls.
+    """
+    R = np.eye(n, dtype=bool)
+    R[src_idx, dst_idx] = True
+    while True:
+        R_float = R.astype(np.float32)
+        R_next = (R_float @ R_float) > 0
+        if np.array_equal(R_next, R):
+            return R
+        R = R_next
+
+def _simulate_chunk(reach_t: np.ndarray, probs: np.ndarray, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """Runs one chunk of Monte Carlo iterations and returns the per-node disruption counts."""
+    # A. Roll the dice for local failure (rows are nodes, columns are simulation runs)
+    failed = rng.random((len(probs), iterations)) < probs[:, None]
+
+    # B. Propagate failure
+    # In this simplified model, if upstream (u) fails, every node downstream of it fails.
+    # A more complex model would use the calculated P(upstream failure) * weight.
+    # Node j is disrupted in a run if any node that reaches j failed locally: one matmul.
+    disrupted = (reach_t @ failed.astype(np.float32)) > 0
+    return disrupted.sum(axis=1)
+
+def monte_carlo_disruption_simulation(G: nx.MultiDiGraph, iterations: int = 1000, chunk_size: int = 10000, n_jobs: int = 1) -> Dict[str, Any]:
     """
     Step 3.3: Monte Carlo simulation to estimate the probability of disruption.
     
     P(final failure) = P(local failure) + P(upstream failure x dependency strength).
+
+    The per-node results ('local_failure_probabilities' and
+    'disruption_probability_by_node') are Dict[Hashable, float] keyed by node key
+    (the integer node id for graphs from build_graph).
+
+    Iterations are split into chunks of at most chunk_size runs, which bounds the
+    size of the failure matrix; each chunk draws from its own independent RNG stream.
+    By default (n_jobs=1) chunks run sequentially. With n_jobs > 1 the iterations are
+    split into at least n_jobs chunks that run concurrently on threads (NumPy releases
+    the GIL). Each chunk's matmul already uses multi-threaded BLAS, so callers setting
+    n_jobs > 1 should cap BLAS threads (e.g. OMP_NUM_THREADS / OPENBLAS_NUM_THREADS=1)
+    to avoid nested parallelism.
     """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be a positive integer, got {chunk_size}")
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be a positive integer, got {n_jobs}")
     
     # --- Step 1: Calculate Probability of Local Failure (based on risk score) ---
     # Rule: Risk Score 0.7-0.9 -> 10% failure proba; 0.9-1.0 -> 20% failure proba
-    failure_prob_local = {}
-    for node, data in G.nodes(data=True):
-        risk = data.get('risk_score', 0.0)
-        if risk >= 0.9:
-            failure_prob_local[node] = 0.20
-        elif risk >= 0.7:
-            failure_prob_local[node] = 0.10
-        else:
-            failure_prob_local[node] = 0.02 # Base failure rate
+    node_order = list(G.nodes)
+    risks = np.fromiter((data.get('risk_score', 0.0) for _, data in G.nodes(data=True)), dtype=float, count=len(node_order))
+    probs = np.where(risks >= 0.9, 0.20, np.where(risks >= 0.7, 0.10, 0.02)) # else: base failure rate
+    failure_prob_local: Dict[Hashable, float] = dict(zip(node_order, probs.tolist()))
 
     # --- Step 2: Monte Carlo Simulation ---
-    disruption_count = {node: 0 for node in G.nodes}
-    
-    for _ in range(iterations):
-        # A. Roll the dice for local failure
-        is_failed = {node: random.random() < failure_prob_local[node] for node in G.nodes}
-        
-        # B. Propagate failure
-        # Use multiple passes to ensure failure flows downstream
-        for pass_num in range(3):
-            for u, v, key, data in G.edges(keys=True, data=True):
-                # u -> v (u is upstream, v is downstream)
-
-                # If upstream (u) is already failed, the failure propagates
-                if is_failed[u]:
-                    is_failed[v] = True
-                    continue
-                
-                # If u is operational, check if v fails due to upstream failure probability
-                # P(upstream failure x dependency strength)
-                # Dependency strength is simulated by the edge weight.
-                
-                # In this simplified model, we use the upstream node's local failure probability
-                # combined with a measure of dependency (1.0 in this model).
-                # A more complex model would use the calculated P(upstream failure) * weight.
-                
-                # For this implementation, we simplify: if upstream fails, downstream fails.
-                
-        # C. Count disruptions
-        for node in G.nodes:
-            if is_failed[node]:
-                disruption_count[node] += 1
+    index = {node: i for i, node in enumerate(node_order)}
+    src_idx = np.array([index[u] for u, v in G.edges()], dtype=np.intp)
+    dst_idx = np.array([index[v] for u, v in G.edges()], dtype=np.intp)
+    reach_t = _reachability_matrix(len(node_order), src_idx, dst_idx).T.astype(np.float32)
+
+    n_chunks = min(iterations, max(n_jobs, math.ceil(iterations / chunk_size)))
+    base, extra = divmod(iterations, n_chunks) if n_chunks else (0, 0)
+    chunks = [base + (i < extra) for i in range(n_chunks)]
+    rngs = [np.random.default_rng(seed) for seed in np.random.SeedSequence().spawn(len(chunks))]
+    if n_jobs > 1 and n_chunks > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            partials = list(pool.map(_simulate_chunk, repeat(reach_t), repeat(probs), chunks, rngs))
+    else:
+        # Single worker: no thread start-up cost
+        partials = list(map(_simulate_chunk, repeat(reach_t), repeat(probs), chunks, rngs))
+
+    # C. Count disruptions
+    counts = np.sum(partials, axis=0) if partials else np.zeros(len(node_order), dtype=int)
+    disruption_count = dict(zip(node_order, counts.tolist()))
 
     # --- Step 3: Calculate Disruption Probability ---
-    disruption_probability = {
+    disruption_probability: Dict[Hashable, float] = {
         node: count / iterations for node, count in disruption_count.items()
     }
     
     # Calculate the probability that the final product (Brand A DC) is disrupted
-    final_product_node = "Brand A Distribution Center"
+    final_product_node = node_id(G, "Brand A Distribution Center")
     final_prob = disruption_probability.get(final_product_node, 0)
     
     return {
@@ -0,0 +1,34 @@
+import pytest
+
+from graph_builder import resolve_entity, resolve_entities, resolve_region
+
+# Names that share a token with a canonical name but are different facilities
+DISTINCT_NAMES = ["Warehouse 3", "Plant 3 Corp", "Facility 7", "Distribution Hub", "Center Logistics"]
+
+
+@pytest.mark.parametrize("raw", DISTINCT_NAMES)
+def test_resolve_entity_keeps_unrelated_names_distinct(raw):
+    assert resolve_entity(raw) == raw
+
+
+def test_resolve_entity_matches_known_variants():
+    assert resolve_entity("Fxncn 3") == "Foxconn Facility No. 3"
+    assert resolve_entity("Foxcon Facility No 3") == "Foxconn Facility No. 3"
+
+
+def test_resolve_entities_keeps_unrelated_names_distinct():
+    assert resolve_entities(DISTINCT_NAMES) == {raw: raw for raw in DISTINCT_NAMES}
+
+
+def test_resolve_entities_agrees_with_resolve_entity():
+    raw_names = DISTINCT_NAMES + ["Fxncn 3", "Brand A DC", "Sunrise Textile", "OEKO-TEX", "GOTS", "China"]
+    assert resolve_entities(raw_names) == {raw: resolve_entity(raw) for raw in raw_names}
+
+
+@pytest.mark.parametrize("raw", ["VN", "vn", " VN "])
+def test_resolve_region_is_case_insensitive(raw):
+    assert resolve_region(raw) == "Vietnam"
+
+
+def test_resolve_region_keeps_unknown_regions():
+    assert resolve_region(" India ") == "India"
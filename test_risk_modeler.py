@@ -0,0 +1,49 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from risk_modeler import calculate_edge_weight, propagation_weights, monte_carlo_disruption_simulation
+
+DEPENDENCIES = [0.0, 0.05, 0.3, 0.7, 1.0, 1.5]
+BUFFER_MONTHS = [0, 1, 2, 3, 6]
+
+
+@pytest.mark.parametrize("dependency", DEPENDENCIES)
+def test_propagation_weights_match_calculate_edge_weight(dependency):
+    buffers = np.array(BUFFER_MONTHS, dtype=float)
+    expected = [
+        calculate_edge_weight({'dependency_weight': dependency, 'inventory_buffer': buffer})
+        for buffer in BUFFER_MONTHS
+    ]
+    actual = propagation_weights(np.full(len(BUFFER_MONTHS), dependency), buffers)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12)
+
+
+def test_calculate_edge_weight_defaults():
+    # No dependency weight and no buffer: 1.0 * (1 - 0.1 * 0.1)
+    assert calculate_edge_weight({}) == pytest.approx(0.99)
+
+
+def _chain_graph():
+    G = nx.MultiDiGraph()
+    G.add_node("Supplier", risk_score=0.95)
+    G.add_node("Brand A Distribution Center", risk_score=0.0)
+    G.add_edge("Supplier", "Brand A Distribution Center")
+    return G
+
+
+@pytest.mark.parametrize("kwargs", [{"chunk_size": 0}, {"chunk_size": -5}, {"n_jobs": 0}])
+def test_monte_carlo_rejects_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        monte_carlo_disruption_simulation(_chain_graph(), iterations=10, **kwargs)
+
+
+@pytest.mark.parametrize("chunk_size, n_jobs", [(10000, 1), (300, 1), (10000, 3), (700, 2)])
+def test_monte_carlo_chunking_covers_all_iterations(chunk_size, n_jobs):
+    result = monte_carlo_disruption_simulation(_chain_graph(), iterations=2000, chunk_size=chunk_size, n_jobs=n_jobs)
+    probs = result["disruption_probability_by_node"]
+    # A downstream node fails whenever its supplier does
+    assert probs["Brand A Distribution Center"] >= probs["Supplier"]
+    # Every probability is a count over exactly 2000 runs
+    assert all(abs(p * 2000 - round(p * 2000)) < 1e-9 for p in probs.values())
+    assert 0.1 < result["final_product_disruption_prob"] < 0.4